@@ -4,28 +4,59 @@ Local MCP approval server that sends WhatsApp messages via Twilio
 """
 
 import os
+import sys
 import json
 import uuid
 import asyncio
+import atexit
+import functools
+import logging
+import logging.handlers
+import queue
+import time
+import re
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+from urllib.parse import parse_qsl
 from dotenv import load_dotenv
 from fastmcp import FastMCP
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from sqlmodel import Field, SQLModel, Session, create_engine, select
+from requests.adapters import HTTPAdapter
+from sqlalchemy import Index, and_, delete, event, or_, update
+from sqlalchemy.pool import QueuePool
+from sqlmodel import Field, SQLModel, Session, create_engine
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
-
-# Load environment variables
-load_dotenv()
+from urllib3.util.retry import Retry
 
 # Initialize MCP server
 mcp = FastMCP("approval-server")
 
+# Logging (handlers are attached on first use by _setup_logging)
+log = logging.getLogger("approval")
+log.setLevel(logging.INFO)
+
+
+@functools.cache
+def _setup_logging():
+    """Route log records through a queue so stream writes happen off the event loop"""
+    log_queue = queue.SimpleQueue()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    log.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    # Flush queued records on interpreter exit
+    atexit.register(listener.stop)
+
+
 # Database models
 class ApprovalRequest(SQLModel, table=True):
+    __table_args__ = (Index("ix_status_expires", "status", "expires_at"),)
+    
     id: str = Field(primary_key=True)
-    request_id: str = Field(unique=True, index=True)
+    request_id: str
     description: str
     requester: str
     phone_number: str
@@ -37,61 +68,221 @@ class ApprovalRequest(SQLModel, table=True):
 
 # Database setup
 DATABASE_URL = "sqlite:///approvals.db"
-engine = create_engine(DATABASE_URL)
-SQLModel.metadata.create_all(engine)
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=0,
+    pool_recycle=3600,
+    pool_pre_ping=False,
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL and relaxed syncing so webhook writes don't block approval reads"""
+    # Disable pysqlite's implicit BEGIN so transactions are started by _begin_immediate
+    dbapi_connection.isolation_level = None
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+    dbapi_connection.execute("PRAGMA synchronous=NORMAL")
+    dbapi_connection.execute("PRAGMA busy_timeout=5000")
+    dbapi_connection.execute("PRAGMA cache_size=-20000")
+    dbapi_connection.execute("PRAGMA temp_store=MEMORY")
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@event.listens_for(engine, "begin")
+def _begin_immediate(conn):
+    """Take the write lock up front instead of upgrading a read lock mid-transaction"""
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+@functools.cache
+def _init_db():
+    """Create database tables and indexes if they don't exist yet (runs once, on first use)"""
+    SQLModel.metadata.create_all(engine)
+    # create_all skips existing tables, so add indexes introduced since the table was created
+    for index in ApprovalRequest.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
 
 # Server configuration
-SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+APPROVAL_TIMEOUT = timedelta(minutes=5)
+PURGE_INTERVAL = 60  # seconds between sweeps of old approval requests
+
+
+@dataclass(frozen=True)
+class Config:
+    """Server and Twilio settings read from the environment"""
+    server_port: int
+    approval_phone: Optional[str]
+    approval_to: Optional[str]
+    approval_retention: timedelta
+    webhook_path: str
+    twilio_whatsapp_from: str
+    twilio_content_sid: Optional[str]
+    twilio_client: Optional[Client]
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        approval_phone = os.environ.get("APPROVAL_PHONE")
+        approval_to = None
+        if approval_phone:
+            approval_to = approval_phone if approval_phone.startswith("whatsapp:") else f"whatsapp:{approval_phone}"
+        
+        # Twilio webhook connection overrides (connect/read timeouts, retry count and policy)
+        # See https://www.twilio.com/docs/usage/webhooks/webhooks-connection-overrides
+        webhook_overrides = os.environ.get("WEBHOOK_OVERRIDES", "ct=3000&rt=1500&rc=5&rp=all")
+        webhook_path = f"/twilio-webhook#{webhook_overrides}" if webhook_overrides else "/twilio-webhook"
+        
+        twilio_client = None
+        account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
+        auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
+        if account_sid and auth_token:
+            # Keep-alive connection pool so repeated sends reuse the TLS connection to Twilio.
+            # Retries only cover failures before the request is sent, so messages are never duplicated.
+            twilio_http = TwilioHttpClient(timeout=5)
+            twilio_http.session.mount("https://", HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=20,
+                max_retries=Retry(total=3, read=0, backoff_factor=0.2),
+            ))
+            twilio_client = Client(account_sid, auth_token, http_client=twilio_http)
+        
+        return cls(
+            server_port=int(os.environ.get("SERVER_PORT", 8000)),
+            approval_phone=approval_phone,
+            approval_to=approval_to,
+            approval_retention=timedelta(days=int(os.environ.get("APPROVAL_RETENTION_DAYS", 7))),
+            webhook_path=webhook_path,
+            twilio_whatsapp_from=os.environ.get("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886"),
+            twilio_content_sid=os.environ.get("TWILIO_CONTENT_SID"),
+            twilio_client=twilio_client,
+        )
+
 
-# Twilio configuration
-TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
-TWILIO_WHATSAPP_FROM = os.environ.get("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
-TWILIO_CONTENT_SID = os.environ.get("TWILIO_CONTENT_SID")
-APPROVAL_PHONE = os.environ.get("APPROVAL_PHONE")
+@functools.cache
+def get_config() -> Config:
+    """Load environment variables (including .env) and build the config on first use"""
+    load_dotenv()
+    return Config.from_env()
+
+
+# Actions accepted from button payloads and list selections
+_VALID_ACTIONS = frozenset({"approve", "deny"})
+
+# Text reply format: "APPROVE <id>" or "DENY <id>"
+_COMMAND_RE = re.compile(r"^(APPROVE|DENY)\s+(\S+)\s*$", re.IGNORECASE)
+
+# Pending approval requests awaiting a webhook response, keyed by short ID
+PENDING: dict[str, asyncio.Future] = {}
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+# Periodic purge of old approval requests, started with the first approval
+_purge_task: Optional[asyncio.Task] = None
+
+
+def _purge_old_requests():
+    """Delete answered and expired requests older than the retention period"""
+    cutoff = datetime.utcnow() - get_config().approval_retention
+    with Session(engine) as session:
+        result = session.exec(
+            delete(ApprovalRequest).where(
+                or_(
+                    and_(ApprovalRequest.status == "pending", ApprovalRequest.expires_at < cutoff),
+                    and_(ApprovalRequest.status != "pending", ApprovalRequest.responded_at < cutoff),
+                )
+            )
+        )
+        session.commit()
+    if result.rowcount:
+        log.info("🧹 Purged %s old approval requests", result.rowcount)
+
+
+async def _purge_loop():
+    """Purge old requests every PURGE_INTERVAL seconds"""
+    while True:
+        try:
+            _purge_old_requests()
+        except Exception as e:
+            log.warning("❌ Failed to purge old approval requests: %s", e)
+        await asyncio.sleep(PURGE_INTERVAL)
+
+
+def _format_request(tool_name: str, input_items: tuple, reason: str) -> str:
+    """Format an approval request description in a more readable way"""
+    lines = []
+    if reason:
+        lines += [f"*Reason:* {reason}", ""]
+    
+    if tool_name == "Bash":
+        params = dict(input_items)
+        lines.append(f"Execute command: `{params.get('command', '')}`")
+        lines.append(f"*Reason:* {params.get('description', '')}")
+    else:
+        lines.append(f"*Tool:* {tool_name}")
+        # Format parameters more nicely, truncating long string values
+        for key, value in input_items:
+            if isinstance(value, str) and len(value) > 50:
+                value = value[:50] + "..."
+            lines.append(f"  • {key}: {value}")
+    
+    return "\n".join(lines)
 
-twilio_client = None
-if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-    twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+# Only small scalar inputs are cached: for these types equal values always format identically
+# (unlike 1/True/1.0 or 0.0/-0.0), and the cache can't pin large file contents in memory
+_CACHEABLE_TYPES = frozenset({str, int, bool, type(None)})
+_CACHEABLE_MAX_LEN = 200
+
+
+@functools.lru_cache(maxsize=128)
+def _format_request_cached(tool_name: str, typed_items: tuple, reason: str) -> str:
+    """Cached _format_request keyed on (key, type, value) so equal values of different types don't collide"""
+    return _format_request(tool_name, tuple((key, value) for key, _, value in typed_items), reason)
 
 
 @mcp.tool()
 async def permissions__approve(tool_name: str, input: dict, reason: str = "") -> dict:
     """Request approval via WhatsApp before executing a tool."""
+    _setup_logging()
+    _init_db()
+    global _purge_task
+    if _purge_task is None:
+        _purge_task = asyncio.create_task(_purge_loop())
     
-    # Format the request description in a more readable way
-    if tool_name == "Bash" and isinstance(input, dict):
-        command = input.get("command", "")
-        description = input.get("description", "")
-        request = f"Execute command: `{command}`\n*Reason:* {description}"
+    # Format the request description, reusing the cached text for repeated small requests
+    input_items = tuple(input.items()) if isinstance(input, dict) else ()
+    if len(reason) <= _CACHEABLE_MAX_LEN and all(
+        type(value) in _CACHEABLE_TYPES and (not isinstance(value, str) or len(value) <= _CACHEABLE_MAX_LEN)
+        for _, value in input_items
+    ):
+        request = _format_request_cached(
+            tool_name, tuple((key, type(value), value) for key, value in input_items), reason
+        )
     else:
-        request = f"*Tool:* {tool_name}"
-        if input:
-            # Format parameters more nicely
-            params = []
-            for key, value in input.items():
-                if isinstance(value, str) and len(value) > 50:
-                    value = value[:50] + "..."
-                params.append(f"  • {key}: {value}")
-            if params:
-                request += "\n" + "\n".join(params)
-    
-    if reason:
-        request = f"*Reason:* {reason}\n\n{request}"
+        request = _format_request(tool_name, input_items, reason)
     
-    print(f"🤖 Claude requesting approval: {request}")
+    log.info("🤖 Claude requesting approval: %s", request)
     
+    config = get_config()
+    twilio_client = config.twilio_client
     if not twilio_client:
-        print("❌ Twilio not configured")
+        log.warning("❌ Twilio not configured")
         return {"error": "Twilio not configured"}
     
-    if not APPROVAL_PHONE:
-        print("❌ APPROVAL_PHONE not configured")
+    if not config.approval_phone:
+        log.warning("❌ APPROVAL_PHONE not configured")
         return {"error": "APPROVAL_PHONE not configured in environment variables"}
     
     request_id = str(uuid.uuid4())
     short_id = request_id[:8]
-    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    created_at = datetime.utcnow()
+    expires_at = created_at + APPROVAL_TIMEOUT
+    deadline = time.monotonic() + APPROVAL_TIMEOUT.total_seconds()
     
     # Create approval request
     approval = ApprovalRequest(
@@ -99,7 +290,8 @@ async def permissions__approve(tool_name: str, input: dict, reason: str = "") ->
         request_id=request_id,
         description=request,
         requester="Claude",
-        phone_number=APPROVAL_PHONE,
+        phone_number=config.approval_phone,
+        created_at=created_at,
         expires_at=expires_at
     )
     
@@ -108,16 +300,19 @@ async def permissions__approve(tool_name: str, input: dict, reason: str = "") ->
         session.add(approval)
         session.commit()
     
-    # Send WhatsApp message
-    to_number = f"whatsapp:{APPROVAL_PHONE}" if not APPROVAL_PHONE.startswith("whatsapp:") else APPROVAL_PHONE
+    # Register a future for the webhook to resolve with the response status
+    future = asyncio.get_running_loop().create_future()
+    PENDING[short_id] = future
     
+    # Send WhatsApp message
     try:
-        if TWILIO_CONTENT_SID:
+        if config.twilio_content_sid:
             # Use content template (quick-reply buttons)
-            message = twilio_client.messages.create(
-                from_=TWILIO_WHATSAPP_FROM,
-                to=to_number,
-                content_sid=TWILIO_CONTENT_SID,
+            message = await asyncio.to_thread(
+                twilio_client.messages.create,
+                from_=config.twilio_whatsapp_from,
+                to=config.approval_to,
+                content_sid=config.twilio_content_sid,
                 content_variables=json.dumps({
                     "1": request,
                     "2": short_id
@@ -136,40 +331,27 @@ Reply:
 • *DENY {short_id}*
 
 ⏱️ Expires in 5 minutes"""
-            message = twilio_client.messages.create(
+            message = await asyncio.to_thread(
+                twilio_client.messages.create,
                 body=message_body.strip(),
-                from_=TWILIO_WHATSAPP_FROM,
-                to=to_number
+                from_=config.twilio_whatsapp_from,
+                to=config.approval_to
             )
         
-        print(f"✅ Sent approval request {short_id} to {APPROVAL_PHONE}")
+        log.info("✅ Sent approval request %s to %s", short_id, config.approval_phone)
         
-        # Wait for approval (poll database)
-        max_wait_time = 300  # 5 minutes
-        check_interval = 2   # Check every 2 seconds
-        start_time = datetime.utcnow()
-        
-        while (datetime.utcnow() - start_time).total_seconds() < max_wait_time:
-            with Session(engine) as session:
-                statement = select(ApprovalRequest).where(ApprovalRequest.id == short_id)
-                current_approval = session.exec(statement).first()
-                
-                if current_approval and current_approval.status != "pending":
-                    print(f"📱 Received response: {current_approval.status}")
-                    if current_approval.status == "approved":
-                        return {"approved": True}
-                    else:
-                        return {"denied": True, "message": "Request was denied"}
-                
-                # Check if expired
-                if datetime.utcnow() > expires_at:
-                    print(f"⏰ Request {short_id} expired")
-                    return {"error": "Request expired"}
-            
-            await asyncio.sleep(check_interval)
+        # Wait for the webhook to resolve the pending future
+        try:
+            status = await asyncio.wait_for(future, timeout=max(0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            log.info("⏰ Request %s expired", short_id)
+            return {"error": "Request expired"}
         
-        print(f"⏰ Request {short_id} timed out")
-        return {"error": "Request timed out"}
+        log.info("📱 Received response: %s", status)
+        if status == "approved":
+            return {"approved": True}
+        else:
+            return {"denied": True, "message": "Request was denied"}
         
     except Exception as e:
         # Clean up database entry on failure
@@ -179,22 +361,46 @@ Reply:
                 session.delete(approval_to_delete)
                 session.commit()
         return {"error": f"Failed to send WhatsApp message: {str(e)}"}
+    finally:
+        PENDING.pop(short_id, None)
 
 
 @mcp.custom_route("/twilio-webhook", methods=["GET"])
 async def webhook_test():
     """Test endpoint to verify webhook URL is reachable"""
-    print("🔥 WEBHOOK GET TEST CALLED!")
+    _setup_logging()
+    log.info("🔥 WEBHOOK GET TEST CALLED!")
     return {"status": "webhook endpoint reachable", "message": "Configure Twilio to POST here"}
 
 
+async def _send_confirmation(to: str, from_: str, body: str):
+    """Send a confirmation message back to the approver"""
+    try:
+        await asyncio.to_thread(
+            get_config().twilio_client.messages.create,
+            body=body,
+            from_=from_,
+            to=to
+        )
+    except Exception as e:
+        log.warning("❌ Failed to send confirmation to %s: %s", to, e)
+
+
 @mcp.custom_route("/twilio-webhook", methods=["POST"])
 async def twilio_webhook(request: Request):
     """Handle incoming WhatsApp messages"""
-    print("🔥 WEBHOOK CALLED!")
+    _setup_logging()
+    log.info("🔥 WEBHOOK CALLED!")
+    
+    raw = await request.body()
     
-    # Parse form data
-    form_data = await request.form()
+    # Delivery status callbacks carry no message body, so skip parsing them entirely
+    if b"MessageStatus=" in raw and b"Body=" not in raw:
+        log.info("📊 Status callback received, ignoring")
+        return JSONResponse({"status": "ok", "message": "Status callback received"})
+    
+    # Parse form data (Twilio always posts application/x-www-form-urlencoded)
+    form_data = dict(parse_qsl(raw.decode(), keep_blank_values=True))
     
     # Extract fields
     Body = form_data.get("Body")
@@ -207,120 +413,109 @@ async def twilio_webhook(request: Request):
     MessageStatus = form_data.get("MessageStatus")
     MessageSid = form_data.get("MessageSid")
     
-    print(f"📱 MessageStatus: {MessageStatus}")
-    print(f"📱 From: {From}, To: {To}")
-    print(f"📱 Body: {Body}")
-    print(f"🔍 ListId: {ListId}")
-    print(f"🔍 ButtonPayload: {ButtonPayload}")
-    print(f"🔍 ButtonText: {ButtonText}")
+    log.info("📱 MessageStatus: %s", MessageStatus)
+    log.info("📱 From: %s, To: %s", From, To)
+    log.info("📱 Body: %s", Body)
+    log.info("🔍 ListId: %s", ListId)
+    log.info("🔍 ButtonPayload: %s", ButtonPayload)
+    log.info("🔍 ButtonText: %s", ButtonText)
     
-    # Debug: Print all form data
-    print("📋 All form data:")
-    for key, value in form_data.items():
-        print(f"  {key}: {value}")
+    # Debug: Log all form data
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("📋 All form data:")
+        for key, value in form_data.items():
+            log.debug("  %s: %s", key, value)
     
     # If this is just a status callback (not an actual message), ignore it
     if MessageStatus and not Body:
-        print("📊 Status callback received, ignoring")
+        log.info("📊 Status callback received, ignoring")
         return JSONResponse({"status": "ok", "message": "Status callback received"})
     
     # Ensure we have From field (Body is optional for button responses)
     if not From:
-        print("❌ Missing From field")
+        log.warning("❌ Missing From field")
         return JSONResponse({"status": "error", "message": "Missing From field"})
     
     # Handle button responses (quick-reply)
     if ButtonPayload:
-        parts = ButtonPayload.split("_")
-        if len(parts) == 2:
-            action, short_id = parts
-            if action in ["approve", "deny"]:
-                response = "approved" if action == "approve" else "denied"
-                response_text = ButtonText or f"{action}_{short_id}"
-            else:
-                return JSONResponse({"status": "ignored", "reason": "Invalid button payload"})
-        else:
+        action, sep, short_id = ButtonPayload.partition("_")
+        if not sep or not short_id:
             return JSONResponse({"status": "ignored", "reason": "Invalid button payload format"})
+        if action not in _VALID_ACTIONS:
+            return JSONResponse({"status": "ignored", "reason": "Invalid button payload"})
+        response = "approved" if action == "approve" else "denied"
+        response_text = ButtonText or f"{action}_{short_id}"
     # Handle list-picker responses (fallback)
     elif ListId:
-        parts = ListId.split(":")
-        if len(parts) == 2:
-            action, short_id = parts
-            if action in ["approve", "deny"]:
-                response = "approved" if action == "approve" else "denied"
-                response_text = f"{action}:{short_id}"
-            else:
-                return JSONResponse({"status": "ignored", "reason": "Invalid list selection"})
-        else:
+        action, sep, short_id = ListId.partition(":")
+        if not sep or not short_id:
             return JSONResponse({"status": "ignored", "reason": "Invalid list ID format"})
+        if action not in _VALID_ACTIONS:
+            return JSONResponse({"status": "ignored", "reason": "Invalid list selection"})
+        response = "approved" if action == "approve" else "denied"
+        response_text = f"{action}:{short_id}"
     else:
         # Handle text responses (fallback)
         if not Body:
-            print("❌ No body content")
+            log.warning("❌ No body content")
             return JSONResponse({"status": "ignored", "reason": "No body content"})
             
-        body = Body.strip().upper()
+        body = Body.strip()
         
         # Parse response
-        if body.startswith("APPROVE "):
-            short_id = body.replace("APPROVE ", "").strip()
-            response = "approved"
-            response_text = body
-        elif body.startswith("DENY "):
-            short_id = body.replace("DENY ", "").strip()
-            response = "denied"
-            response_text = body
-        else:
-            print(f"❌ Invalid format: {body}")
+        match = _COMMAND_RE.match(body)
+        if not match:
+            log.warning("❌ Invalid format: %s", body)
             return JSONResponse({"status": "ignored", "reason": "Invalid format"})
-    
-    # Update database
-    with Session(engine) as session:
-        # Extract phone number from From field (remove "whatsapp:" prefix if present)
-        from_phone = From.replace("whatsapp:", "") if From and From.startswith("whatsapp:") else From
         
-        # Check if request exists and is still pending
-        statement = select(ApprovalRequest).where(
+        action, short_id = match.groups()
+        # Short IDs are lowercase hex, but replies may be typed in any case
+        short_id = short_id.lower()
+        response = "approved" if action.upper() == "APPROVE" else "denied"
+        response_text = body
+    
+    _init_db()
+    
+    # Extract phone number from From field (remove "whatsapp:" prefix if present)
+    from_phone = From.removeprefix("whatsapp:")
+    
+    # Update the request only if it belongs to the sender, is still pending and hasn't expired
+    now = datetime.utcnow()
+    statement = (
+        update(ApprovalRequest)
+        .where(
             ApprovalRequest.id == short_id,
-            ApprovalRequest.phone_number == from_phone
+            ApprovalRequest.phone_number == from_phone,
+            ApprovalRequest.status == "pending",
+            ApprovalRequest.expires_at > now,
         )
-        approval = session.exec(statement).first()
-        
-        if not approval:
-            print(f"❌ Request {short_id} not found")
-            return JSONResponse({"status": "error", "reason": "Request not found"})
-        
-        if approval.status != "pending":
-            print(f"❌ Request {short_id} already processed")
-            return JSONResponse({"status": "error", "reason": "Request already processed"})
-        
-        if datetime.utcnow() > approval.expires_at:
-            print(f"❌ Request {short_id} expired")
-            return JSONResponse({"status": "error", "reason": "Request expired"})
-        
-        # Update the request
-        approval.status = response
-        approval.response = response_text
-        approval.responded_at = datetime.utcnow()
-        session.add(approval)
+        .values(status=response, response=response_text, responded_at=now)
+        .returning(ApprovalRequest.request_id)
+    )
+    with Session(engine) as session:
+        request_id = session.exec(statement).scalar()
         session.commit()
-        session.refresh(approval)
-        
-        print(f"✅ Request {short_id} {response}")
-        
-        request_id = approval.request_id
     
-    # Send confirmation message
-    if twilio_client:
+    if request_id is None:
+        log.warning("❌ Request %s not found, already processed or expired", short_id)
+        return JSONResponse({"status": "error", "reason": "Request not found, already processed or expired"})
+    
+    log.info("✅ Request %s %s", short_id, response)
+    
+    # Wake up the waiting approval request
+    future = PENDING.pop(short_id, None)
+    if future and not future.done():
+        future.set_result(response)
+    
+    # Send confirmation message in the background so Twilio gets its response right away
+    if get_config().twilio_client:
         if response == "approved":
             confirmation = f"✅ Request {short_id} has been approved."
         else:
             confirmation = f"❌ Request {short_id} has been denied."
-        twilio_client.messages.create(
-            body=confirmation,
-            from_=To,
-            to=From
-        )
+        task = asyncio.create_task(_send_confirmation(to=From, from_=To, body=confirmation))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
     
     return JSONResponse({
         "status": "success",
@@ -330,25 +525,28 @@ async def twilio_webhook(request: Request):
 
 
 if __name__ == "__main__":
+    config = get_config()
+    _init_db()
+    _setup_logging()
     
     print("🚀 Starting approval MCP server...")
-    print(f"📱 Approval messages will be sent to: {APPROVAL_PHONE or 'NOT CONFIGURED'}")
-    print(f"🔧 Twilio configured: {twilio_client is not None}")
+    print(f"📱 Approval messages will be sent to: {config.approval_phone or 'NOT CONFIGURED'}")
+    print(f"🔧 Twilio configured: {config.twilio_client is not None}")
     
-    if not APPROVAL_PHONE:
+    if not config.approval_phone:
         print("⚠️  WARNING: APPROVAL_PHONE not set in environment variables")
     print()
     print("🌐 Server endpoints:")
-    print(f"   • MCP: http://localhost:{SERVER_PORT} (FastMCP HTTP server)") 
+    print(f"   • MCP: http://localhost:{config.server_port} (FastMCP HTTP server)") 
     print("   • Webhook: POST /twilio-webhook (for Twilio)")
     print("   • Test: GET /twilio-webhook (browser test)")
     print()
     print("📡 Expose webhook with ngrok:")
-    print(f"   ngrok http {SERVER_PORT}")
+    print(f"   ngrok http {config.server_port}")
     print()
     print("⚙️  Configure Twilio webhook:")
     print("   Method: POST")
-    print("   URL: https://your-ngrok-url.ngrok.io/twilio-webhook")
+    print(f"   URL: https://your-ngrok-url.ngrok.io{config.webhook_path}")
     print()
     print("💡 To test:")
     print("1. Configure Claude to connect to this server")
@@ -358,7 +556,7 @@ if __name__ == "__main__":
     
     # FastMCP runs with SSE transport
     try:
-        mcp.run(transport="sse", host="127.0.0.1", port=SERVER_PORT)
+        mcp.run(transport="sse", host="127.0.0.1", port=config.server_port)
     except Exception as e:
         print(f"❌ Server error: {e}")
         sys.exit(1)
\ No newline at end of file